@@ -2,17 +2,22 @@
 """
 Handlers for working with PostgreSQL's COPY command.
 """
+import codecs
 import csv
 import logging
 import os
 import sys
 from collections import OrderedDict
+from contextlib import contextmanager
 from io import TextIOWrapper
 
 from django.contrib.humanize.templatetags.humanize import intcomma
 from django.core.exceptions import FieldDoesNotExist
 from django.db import NotSupportedError, connections, router
 
+from .copy_to import quote_literal
+from .psycopg_compat import BUFFER_SIZE, copy_from
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,11 +50,10 @@ class CopyMapping:
         if hasattr(csv_path_or_obj, "read"):
             self.csv_file = csv_path_or_obj
         else:
-            # ... verify the path exists ...
+            # ... verify the path exists. It isn't opened until it is read.
             if not os.path.exists(self.csv_path_or_obj):
                 raise ValueError("CSV path does not exist")
-            # ... then open it up.
-            self.csv_file = open(self.csv_path_or_obj)
+            self.csv_file = None
 
         # Hook in the other optional settings
         self.quote_character = quote_character
@@ -93,6 +97,9 @@ class CopyMapping:
         # Make sure the everything is legit
         self.validate_mapping()
 
+        # Work out how each field will be selected from the temporary table
+        self.templates = self.get_templates()
+
         # Configure the name of our temporary table to COPY into
         self.temp_table_name = temp_table_name or "temp_%s" % self.model._meta.db_table
 
@@ -150,24 +157,58 @@ class CopyMapping:
             return OrderedDict(mapping)
         return {name: name for name in self.headers}
 
+    @contextmanager
+    def open_csv(self):
+        """
+        Yields the CSV file object, opening it from the path if no file object was provided.
+        """
+        if self.csv_file is not None:
+            yield self.csv_file
+        else:
+            # The raw bytes go straight to the database,
+            # so skip decoding them and read in large chunks.
+            with open(self.csv_path_or_obj, "rb", buffering=BUFFER_SIZE) as csv_file:
+                yield csv_file
+
+    def get_header_encoding(self):
+        """
+        Returns the Python codec used to read the header row.
+
+        PostgreSQL knows some encodings, like WIN1252, by names Python doesn't,
+        so those fall back to utf-8.
+        """
+        if self.encoding:
+            try:
+                return codecs.lookup(self.encoding).name
+            except LookupError:
+                pass
+        return "utf-8"
+
     def get_headers(self):
         """
         Returns the column headers from the csv as a list.
         """
-        logger.debug(f"Retrieving headers from {self.csv_file}")
+        logger.debug(f"Retrieving headers from {self.csv_path_or_obj}")
+        if self.csv_file is None:
+            # Paths are opened in binary mode for COPY, so read the header row
+            # through a text-mode open of its own
+            with open(
+                self.csv_path_or_obj, newline="", encoding=self.get_header_encoding()
+            ) as csv_file:
+                return next(csv.reader(csv_file, delimiter=self.delimiter))
+
+        csv_file = self.csv_file
         # set up a csv reader
-        csv_reader = csv.reader(self.csv_file, delimiter=self.delimiter)
+        csv_reader = csv.reader(csv_file, delimiter=self.delimiter)
         try:
             # Pop the headers
             headers = next(csv_reader)
         except csv.Error:
             # this error is thrown in Python 3 when the file is in binary mode
             # first, rewind the file
-            self.csv_file.seek(0)
-            # take the user-defined encoding, or assume utf-8
-            encoding = self.encoding or "utf-8"
+            csv_file.seek(0)
             # wrap the binary file...
-            text_file = TextIOWrapper(self.csv_file, encoding=encoding)
+            text_file = TextIOWrapper(csv_file, encoding=self.get_header_encoding())
             # ...so the csv reader can treat it as text
             csv_reader = csv.reader(text_file, delimiter=self.delimiter)
             # now pop the headers
@@ -176,10 +217,44 @@ class CopyMapping:
             text_file.detach()
 
         # Move back to the top of the file
-        self.csv_file.seek(0)
+        csv_file.seek(0)
 
         return headers
 
+    def get_templates(self):
+        """
+        Returns the SQL template that selects each mapped field from the temporary table.
+        """
+        templates = {}
+        model_instance = None
+        for field_name in self.mapping.keys():
+            # Pull the field object from the model
+            field = self.get_field(field_name)
+            field_type = field.db_type(self.conn)
+            if field_type in ["serial", "bigserial"]:
+                field_type = "integer"
+
+            # Format the SQL. The temporary table is all text, so text fields need no cast.
+            if field_type == "text":
+                template = '"%(name)s"'
+            else:
+                template = 'cast("%%(name)s" as %s)' % field_type.replace("%", "%%")
+
+            # Apply a datatype template override, if it exists
+            if hasattr(field, "copy_template"):
+                template = field.copy_template
+
+            # Apply a field specific template override, if it exists
+            template_method = "copy_%s_template" % field.name
+            if hasattr(self.model, template_method):
+                # Only build a model instance once, and only if there's a method to call
+                if model_instance is None:
+                    model_instance = self.model()
+                template = getattr(model_instance, template_method)()
+
+            templates[field_name] = template
+        return templates
+
     def validate_mapping(self):
         """
         Verify that the mapping provided by the user is acceptable.
@@ -187,8 +262,9 @@ class CopyMapping:
         Raises errors if something goes wrong. Returns nothing if everything is kosher.
         """
         # Make sure all of the CSV headers in the mapping actually exist
+        headers = frozenset(self.headers)
         for map_header in self.mapping.values():
-            if map_header not in self.headers:
+            if map_header not in headers:
                 raise ValueError(f"Header '{map_header}' not found in CSV file")
 
         # Make sure all the model fields in the mapping actually exist
@@ -264,11 +340,11 @@ class CopyMapping:
             "header_list": ", ".join([f'"{h}"' for h in self.headers]),
         }
         if self.quote_character:
-            options["extra_options"] += f" QUOTE '{self.quote_character}'"
+            options["extra_options"] += f" QUOTE {quote_literal(self.quote_character)}"
         if self.delimiter:
-            options["extra_options"] += f" DELIMITER '{self.delimiter}'"
+            options["extra_options"] += f" DELIMITER {quote_literal(self.delimiter)}"
         if self.null is not None:
-            options["extra_options"] += f" NULL '{self.null}'"
+            options["extra_options"] += f" NULL {quote_literal(self.null)}"
         if self.force_not_null is not None:
             options["extra_options"] += " FORCE NOT NULL {}".format(
                 ",".join(f'"{s}"' for s in self.force_not_null)
@@ -278,7 +354,7 @@ class CopyMapping:
                 ",".join('"%s"' % s for s in self.force_null)
             )
         if self.encoding:
-            options["extra_options"] += f" ENCODING '{self.encoding}'"
+            options["extra_options"] += f" ENCODING {quote_literal(self.encoding)}"
         return sql % options
 
     def pre_copy(self, cursor):
@@ -300,10 +376,11 @@ class CopyMapping:
         logger.debug("Running COPY command")
         copy_sql = self.prep_copy()
         logger.debug(copy_sql)
-        cursor.copy_expert(copy_sql, self.csv_file)
+        with self.open_csv() as csv_file:
+            copy_from(cursor, copy_sql, csv_file)
 
-        # At this point all data has been loaded to the temp table
-        self.csv_file.close()
+            # At this point all data has been loaded to the temp table
+            csv_file.close()
 
         # Run post-copy hook
         self.post_copy(cursor)
@@ -365,27 +442,7 @@ class CopyMapping:
 
         temp_fields = []
         for field_name, header in self.mapping.items():
-            # Pull the field object from the model
-            field = self.get_field(field_name)
-            field_type = field.db_type(self.conn)
-            if field_type in ["serial", "bigserial"]:
-                field_type = "integer"
-
-            # Format the SQL
-            string = f'cast("{header}" as {field_type})'
-
-            # Apply a datatype template override, if it exists
-            if hasattr(field, "copy_template"):
-                string = field.copy_template % dict(name=header)
-
-            # Apply a field specific template override, if it exists
-            template_method = "copy_%s_template" % field.name
-            if hasattr(self.model, template_method):
-                template = getattr(self.model(), template_method)()
-                string = template % dict(name=header)
-
-            # Add field to list
-            temp_fields.append(string)
+            temp_fields.append(self.templates[field_name] % dict(name=header))
 
         # Tack on static fields
         for v in self.static_mapping.values():
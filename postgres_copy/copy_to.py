@@ -9,11 +9,19 @@ from io import BytesIO
 from django.db import connections
 from django.db.models.sql.compiler import SQLCompiler
 from django.db.models.sql.query import Query
-from psycopg2.extensions import adapt
+
+from .psycopg_compat import BUFFER_SIZE, copy_to
 
 logger = logging.getLogger(__name__)
 
 
+def quote_literal(value):
+    """
+    Returns the value as a quoted SQL string literal for use in COPY options.
+    """
+    return "'{}'".format(str(value).replace("'", "''"))
+
+
 class SQLCopyToCompiler(SQLCompiler):
     """
     Custom SQL compiler for creating a COPY TO query (postgres backend only).
@@ -42,45 +50,31 @@ class SQLCopyToCompiler(SQLCompiler):
         """
         logger.debug(f"Copying data to {csv_path_or_obj}")
 
-        # adapt SELECT query parameters to SQL syntax
-        params = self.as_sql()[1]
-        adapted_params = tuple(adapt(p) for p in params)
+        # compile the SELECT query; its parameters are bound by the database driver
+        select_sql, params = self.as_sql()
 
         # use stdout to avoid file permission issues
         with connections[self.using].cursor() as c:
-            # compile the SELECT query
-            select_sql = self.as_sql()[0] % adapted_params
-            # then the COPY TO query
-            copy_to_sql = "COPY ({}) TO STDOUT {} CSV"
-            copy_to_sql = copy_to_sql.format(select_sql, self.query.copy_to_delimiter)
-            # Optional extras
-            options_list = [
-                self.query.copy_to_header,
-                self.query.copy_to_null_string,
-                self.query.copy_to_quote_char,
-                self.query.copy_to_force_quote,
-                self.query.copy_to_encoding,
-                self.query.copy_to_escape,
-            ]
-            options_sql = " ".join([o for o in options_list if o]).strip()
-            if options_sql:
-                copy_to_sql = copy_to_sql + " " + options_sql
+            # then the COPY TO query, with any optional extras.
+            # The statement is a parameter template, so escape any percent signs.
+            options_sql = self.query.copy_to_options.replace("%", "%%")
+            copy_to_sql = f"COPY ({select_sql}) TO STDOUT {options_sql}"
             # then execute
             logger.debug(copy_to_sql)
 
             # If a file-like object was provided, write it out there.
             if hasattr(csv_path_or_obj, "write"):
-                c.cursor.copy_expert(copy_to_sql, csv_path_or_obj)
+                copy_to(c.cursor, copy_to_sql, params, csv_path_or_obj)
                 return
             # If a file path was provided, write it out there.
             elif csv_path_or_obj:
-                with open(csv_path_or_obj, "wb") as stdout:
-                    c.cursor.copy_expert(copy_to_sql, stdout)
+                with open(csv_path_or_obj, "wb", buffering=BUFFER_SIZE) as stdout:
+                    copy_to(c.cursor, copy_to_sql, params, stdout)
                     return
             # If there's no csv_path, return the output as a string.
             else:
                 stdout = BytesIO()
-                c.cursor.copy_expert(copy_to_sql, stdout)
+                copy_to(c.cursor, copy_to_sql, params, stdout)
                 return stdout.getvalue()
 
 
@@ -94,3 +88,50 @@ class CopyToQuery(Query):
         Return a SQLCopyToCompiler object.
         """
         return SQLCopyToCompiler(self, connection, using)
+
+    def set_copy_to_options(self, **kwargs):
+        """
+        Converts the keyword options passed to to_csv into a COPY TO option string.
+        """
+        # Delimiter
+        delimiter = kwargs.get("delimiter", ",")
+        options = [f"DELIMITER {quote_literal(delimiter)}", "CSV"]
+
+        # Header
+        if kwargs.get("header", True):
+            options.append("HEADER")
+
+        # Null string
+        null_string = kwargs.get("null")
+        if null_string:
+            options.append(f"NULL {quote_literal(null_string)}")
+
+        # Quote character
+        quote_char = kwargs.get("quote")
+        if quote_char:
+            options.append(f"QUOTE {quote_literal(quote_char)}")
+
+        # Force quote on columns
+        force_quote = kwargs.get("force_quote")
+        if force_quote:
+            # If it's a list or tuple of fields, pass them in with commas
+            if isinstance(force_quote, (list, tuple)):
+                options.append("FORCE QUOTE {}".format(", ".join(force_quote)))
+            # If it's True or a * force quote everything
+            elif force_quote is True or force_quote == "*":
+                options.append("FORCE QUOTE *")
+            # Otherwise, assume it's a string and pass it through
+            else:
+                options.append(f"FORCE QUOTE {force_quote}")
+
+        # Encoding
+        set_encoding = kwargs.get("encoding")
+        if set_encoding:
+            options.append(f"ENCODING {quote_literal(set_encoding)}")
+
+        # Escape character
+        escape_char = kwargs.get("escape")
+        if escape_char:
+            options.append(f"ESCAPE {quote_literal(escape_char)}")
+
+        self.copy_to_options = " ".join(options)
@@ -1,8 +1,10 @@
 #!/usr/bin/env python
 
 import logging
+from functools import lru_cache
 
-from django.db import connection, models
+from django.db import DatabaseError, connection, models, transaction
+from django.db.models.options import normalize_together
 from django.db.transaction import TransactionManagementError
 
 from .copy_from import CopyMapping
@@ -11,6 +13,33 @@ from .copy_to import CopyToQuery
 logger = logging.getLogger(__name__)
 
 
+# The caches are bounded so they don't keep every model they've seen alive
+@lru_cache(maxsize=128)
+def _get_constrained_fields(model):
+    """
+    Returns a tuple of the model's fields with db_constraint set to True.
+    """
+    return tuple(f for f in model._meta.fields if getattr(f, "db_constraint", False))
+
+
+@lru_cache(maxsize=128)
+def _get_indexed_fields(model):
+    """
+    Returns a tuple of the model's fields with db_index set to True.
+    """
+    return tuple(f for f in model._meta.fields if f.db_index)
+
+
+@lru_cache(maxsize=128)
+def _get_field_copy(field, attname):
+    """
+    Returns a copy of the field with the provided attribute set to False.
+    """
+    field_copy = field.__copy__()
+    setattr(field_copy, attname, False)
+    return field_copy
+
+
 class ConstraintQuerySet(models.QuerySet):
     """
     Utilities for temporarily dropping and restoring constraints and indexes.
@@ -19,130 +48,265 @@ class ConstraintQuerySet(models.QuerySet):
     @property
     def constrained_fields(self):
         """
-        Returns list of model's fields with db_constraint set to True.
+        Returns tuple of model's fields with db_constraint set to True.
         """
-        return [
-            f
-            for f in self.model._meta.fields
-            if hasattr(f, "db_constraint") and f.db_constraint
-        ]
+        return _get_constrained_fields(self.model)
 
     @property
     def indexed_fields(self):
         """
-        Returns list of model's fields with db_index set to True.
+        Returns tuple of model's fields with db_index set to True.
+        """
+        return _get_indexed_fields(self.model)
+
+    def _get_table_constraints(self):
+        """
+        Returns the constraints and indexes currently on the model's table, by name.
+        """
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, self.model._meta.db_table
+            )
+        # Leave out the ones declared in Meta, which are never dropped here
+        meta_names = {c.name for c in self.model._meta.constraints}
+        meta_names.update(i.name for i in self.model._meta.indexes)
+        return {
+            name: c for name, c in constraints.items() if name not in meta_names
+        }
+
+    def _has_foreign_key(self, constraints, field):
+        """
+        Returns True if the field's foreign key constraint is in the database.
         """
-        return [f for f in self.model._meta.fields if f.db_index]
+        return any(
+            c["foreign_key"] and c["columns"] == [field.column]
+            for c in constraints.values()
+        )
+
+    def _has_index(self, schema_editor, constraints, field):
+        """
+        Returns True if the index Django creates for the field is in the database.
+        """
+        # Match on the name so other indexes on the same column don't count
+        name = schema_editor._create_index_name(
+            self.model._meta.db_table, [field.column]
+        )
+        return name in constraints
+
+    def _has_unique_together(self, constraints, field_names):
+        """
+        Returns True if the unique constraint across the fields is in the database.
+        """
+        columns = [self.model._meta.get_field(name).column for name in field_names]
+        return any(
+            c["unique"] and not c["primary_key"] and c["columns"] == columns
+            for c in constraints.values()
+        )
+
+    def _has_index_together(self, constraints, field_names):
+        """
+        Returns True if the index across the fields is in the database.
+        """
+        columns = [self.model._meta.get_field(name).column for name in field_names]
+        return any(
+            c["index"] and not c["unique"] and c["columns"] == columns
+            for c in constraints.values()
+        )
+
+    def _get_index_together(self, schema_editor):
+        """
+        Returns the model's index_together sets, if the schema editor can alter them.
+        """
+        # Django 5.1 removed alter_index_together along with the option
+        if not hasattr(schema_editor, "alter_index_together"):
+            return ()
+        return normalize_together(getattr(self.model._meta, "index_together", ()))
 
     def edit_schema(self, schema_editor, method_name, args):
         """
         Edits the schema without throwing errors.
 
         This allows for the add and drop methods to be run frequently and without fear.
+        Returns True if the edit was made.
         """
         try:
-            getattr(schema_editor, method_name)(*args)
-        except Exception:
+            # A savepoint keeps a failed edit from aborting the rest of the session
+            with transaction.atomic(using=schema_editor.connection.alias):
+                getattr(schema_editor, method_name)(*args)
+        except (DatabaseError, ValueError):
             logger.debug(f"Edit of {schema_editor}.{method_name} failed. Skipped")
-            pass
+            return False
+        return True
 
     def drop_constraints(self):
         """
         Drop constraints on the model and its fields.
+
+        Returns True if anything was dropped.
         """
-        logger.debug(f"Dropping constraints from {self.model.__name__}")
         with connection.schema_editor() as schema_editor:
-            # Remove any "unique_together" constraints
-            # NOTE: "unique_together" may be deprecated in the future
-            if getattr(self.model._meta, 'unique_together', False):
-                logger.debug(
-                    "Dropping unique_together of {}".format(
-                        self.model._meta.unique_together
-                    )
-                )
-                args = (self.model, self.model._meta.unique_together, ())
-                self.edit_schema(schema_editor, "alter_unique_together", args)
+            unique_together, fields = self._drop_constraints(
+                schema_editor, self._get_table_constraints()
+            )
+        return bool(unique_together or fields)
 
-            # Remove any field constraints
-            for field in self.constrained_fields:
-                logger.debug(f"Dropping constraints from {field}")
-                field_copy = field.__copy__()
-                field_copy.db_constraint = False
-                args = (self.model, field, field_copy)
-                self.edit_schema(schema_editor, "alter_field", args)
+    def _drop_constraints(self, schema_editor, constraints):
+        """
+        Drop constraints on the model and its fields using an open schema editor.
+
+        Returns the unique_together sets and the fields whose constraints were dropped.
+        """
+        logger.debug(f"Dropping constraints from {self.model.__name__}")
+
+        # Remove any "unique_together" constraints that are in the database
+        # NOTE: "unique_together" may be deprecated in the future
+        unique_together = [
+            fields
+            for fields in normalize_together(
+                getattr(self.model._meta, "unique_together", ())
+            )
+            if self._has_unique_together(constraints, fields)
+        ]
+        if unique_together:
+            logger.debug(f"Dropping unique_together of {unique_together}")
+            args = (self.model, unique_together, ())
+            if not self.edit_schema(schema_editor, "alter_unique_together", args):
+                unique_together = []
+
+        # Remove any field constraints
+        fields = []
+        for field in self.constrained_fields:
+            if not self._has_foreign_key(constraints, field):
+                continue
+            logger.debug(f"Dropping constraints from {field}")
+            field_copy = _get_field_copy(field, "db_constraint")
+            args = (self.model, field, field_copy)
+            if self.edit_schema(schema_editor, "alter_field", args):
+                fields.append(field)
+
+        return unique_together, fields
 
     def drop_indexes(self):
         """
         Drop indexes on the model and its fields.
+
+        Returns True if anything was dropped.
         """
-        logger.debug(f"Dropping indexes from {self.model.__name__}")
         with connection.schema_editor() as schema_editor:
-            if getattr(self.model._meta, 'index_together', False):
-                # Remove any "index_together" constraints
-                # NOTE: "index_together has been removed from Django 5.1
-                logger.debug(
-                    f"Dropping index_together of {self.model._meta.index_together}"
-                )
-                args = (self.model, self.model._meta.index_together, ())
-                self.edit_schema(schema_editor, "alter_index_together", args)
+            index_together, fields = self._drop_indexes(
+                schema_editor, self._get_table_constraints()
+            )
+        return bool(index_together or fields)
 
-            # Remove any field indexes
-            for field in self.indexed_fields:
-                logger.debug(f"Dropping index from {field}")
-                field_copy = field.__copy__()
-                field_copy.db_index = False
-                args = (self.model, field, field_copy)
-                self.edit_schema(schema_editor, "alter_field", args)
+    def _drop_indexes(self, schema_editor, constraints):
+        """
+        Drop indexes on the model and its fields using an open schema editor.
+
+        Returns the index_together sets and the fields whose indexes were dropped.
+        """
+        logger.debug(f"Dropping indexes from {self.model.__name__}")
+
+        # Remove any "index_together" constraints that are in the database
+        # NOTE: "index_together has been removed from Django 5.1
+        index_together = [
+            fields
+            for fields in self._get_index_together(schema_editor)
+            if self._has_index_together(constraints, fields)
+        ]
+        if index_together:
+            logger.debug(f"Dropping index_together of {index_together}")
+            args = (self.model, index_together, ())
+            if not self.edit_schema(schema_editor, "alter_index_together", args):
+                index_together = []
+
+        # Remove any field indexes
+        fields = []
+        for field in self.indexed_fields:
+            if not self._has_index(schema_editor, constraints, field):
+                continue
+            logger.debug(f"Dropping index from {field}")
+            field_copy = _get_field_copy(field, "db_index")
+            args = (self.model, field, field_copy)
+            if self.edit_schema(schema_editor, "alter_field", args):
+                fields.append(field)
+
+        return index_together, fields
 
     def restore_constraints(self):
         """
         Restore constraints on the model and its fields.
         """
-        logger.debug(f"Adding constraints to {self.model.__name__}")
+        constraints = self._get_table_constraints()
         with connection.schema_editor() as schema_editor:
-            # Add any "unique_together" contraints from the database
+            # Add any "unique_together" contraints missing from the database
             # NOTE: "unique_together" may be deprecated in the future
-            if getattr(self.model._meta, 'unique_together', False):
-                logger.debug(
-                    "Adding unique_together of {}".format(
-                        self.model._meta.unique_together
-                    )
+            unique_together = [
+                fields
+                for fields in normalize_together(
+                    getattr(self.model._meta, "unique_together", ())
                 )
-                args = (self.model, (), self.model._meta.unique_together)
-                self.edit_schema(schema_editor, "alter_unique_together", args)
-
-            # Add any constraints to the fields
-            for field in self.constrained_fields:
-                logger.debug(f"Adding constraints to {field}")
-                field_copy = field.__copy__()
-                field_copy.db_constraint = False
-                args = (self.model, field_copy, field)
-                self.edit_schema(schema_editor, "alter_field", args)
+                if not self._has_unique_together(constraints, fields)
+            ]
+            fields = [
+                field
+                for field in self.constrained_fields
+                if not self._has_foreign_key(constraints, field)
+            ]
+            self._restore_constraints(schema_editor, unique_together, fields)
+
+    def _restore_constraints(self, schema_editor, unique_together, fields):
+        """
+        Restore the provided constraints using an open schema editor.
+        """
+        logger.debug(f"Adding constraints to {self.model.__name__}")
+        if unique_together:
+            logger.debug(f"Adding unique_together of {unique_together}")
+            args = (self.model, (), unique_together)
+            self.edit_schema(schema_editor, "alter_unique_together", args)
+
+        # Add the constraints to the fields
+        for field in fields:
+            logger.debug(f"Adding constraints to {field}")
+            field_copy = _get_field_copy(field, "db_constraint")
+            args = (self.model, field_copy, field)
+            self.edit_schema(schema_editor, "alter_field", args)
 
     def restore_indexes(self):
         """
         Restore indexes on the model and its fields.
         """
-        logger.debug(f"Adding indexes to {self.model.__name__}")
+        constraints = self._get_table_constraints()
         with connection.schema_editor() as schema_editor:
-            if getattr(self.model._meta, 'index_together', False):
-                # Add any "index_together" contraints to the database.
-                # NOTE: "index_together has been removed from Django 5.1
-                logger.debug(
-                    "Restoring index_together of {}".format(
-                        self.model._meta.index_together
-                    )
-                )
-                args = (self.model, (), self.model._meta.index_together)
-                self.edit_schema(schema_editor, "alter_index_together", args)
+            # Add any "index_together" contraints missing from the database
+            # NOTE: "index_together has been removed from Django 5.1
+            index_together = [
+                fields
+                for fields in self._get_index_together(schema_editor)
+                if not self._has_index_together(constraints, fields)
+            ]
+            fields = [
+                field
+                for field in self.indexed_fields
+                if not self._has_index(schema_editor, constraints, field)
+            ]
+            self._restore_indexes(schema_editor, index_together, fields)
+
+    def _restore_indexes(self, schema_editor, index_together, fields):
+        """
+        Restore the provided indexes using an open schema editor.
+        """
+        logger.debug(f"Adding indexes to {self.model.__name__}")
+        if index_together:
+            logger.debug(f"Restoring index_together of {index_together}")
+            args = (self.model, (), index_together)
+            self.edit_schema(schema_editor, "alter_index_together", args)
 
-            # Add any indexes to the fields
-            for field in self.indexed_fields:
-                logger.debug(f"Restoring index to {field}")
-                field_copy = field.__copy__()
-                field_copy.db_index = False
-                args = (self.model, field_copy, field)
-                self.edit_schema(schema_editor, "alter_field", args)
+        # Add the indexes to the fields
+        for field in fields:
+            logger.debug(f"Restoring index to {field}")
+            field_copy = _get_field_copy(field, "db_index")
+            args = (self.model, field_copy, field)
+            self.edit_schema(schema_editor, "alter_field", args)
 
 
 class CopyQuerySet(ConstraintQuerySet):
@@ -180,17 +344,25 @@ class CopyQuerySet(ConstraintQuerySet):
 
         mapping = CopyMapping(self.model, csv_path, mapping, **kwargs)
 
-        if drop_constraints:
-            self.drop_constraints()
-        if drop_indexes:
-            self.drop_indexes()
+        # Make all of the drops in one schema editor session
+        dropped_constraints = dropped_indexes = ((), ())
+        if drop_constraints or drop_indexes:
+            constraints = self._get_table_constraints()
+            with connection.schema_editor() as schema_editor:
+                if drop_constraints:
+                    dropped_constraints = self._drop_constraints(
+                        schema_editor, constraints
+                    )
+                if drop_indexes:
+                    dropped_indexes = self._drop_indexes(schema_editor, constraints)
 
         insert_count = mapping.save(silent=silent)
 
-        if drop_constraints:
-            self.restore_constraints()
-        if drop_indexes:
-            self.restore_indexes()
+        # And restore exactly what was dropped in another, once the data is in
+        if any(dropped_constraints) or any(dropped_indexes):
+            with connection.schema_editor() as schema_editor:
+                self._restore_constraints(schema_editor, *dropped_constraints)
+                self._restore_indexes(schema_editor, *dropped_indexes)
 
         return insert_count
 
@@ -198,55 +370,13 @@ class CopyQuerySet(ConstraintQuerySet):
         """
         Copy current QuerySet to CSV at provided path or file-like object.
         """
-        try:
-            # For Django 2.0 forward
-            query = self.query.chain(CopyToQuery)
-        except AttributeError:
-            # For Django 1.11 backward
-            query = self.query.clone(CopyToQuery)
+        query = self.query.chain(CopyToQuery)
 
         # Get fields
         query.copy_to_fields = fields
 
-        # Delimiter
-        query.copy_to_delimiter = "DELIMITER '{}'".format(kwargs.get("delimiter", ","))
-
-        # Header
-        with_header = kwargs.get("header", True)
-        query.copy_to_header = "HEADER" if with_header else ""
-
-        # Null string
-        null_string = kwargs.get("null")
-        query.copy_to_null_string = f"NULL '{null_string}'" if null_string else ""
-
-        # Quote character
-        quote_char = kwargs.get("quote")
-        query.copy_to_quote_char = f"QUOTE '{quote_char}'" if quote_char else ""
-
-        # Force quote on columns
-        force_quote = kwargs.get("force_quote")
-        if force_quote:
-            # If it's a list of fields, pass them in with commas
-            if isinstance(force_quote, list):
-                query.copy_to_force_quote = "FORCE QUOTE {}".format(
-                    ", ".join(column for column in force_quote)
-                )
-            # If it's True or a * force quote everything
-            elif force_quote is True or force_quote == "*":
-                query.copy_to_force_quote = "FORCE QUOTE *"
-            # Otherwise, assume it's a string and pass it through
-            else:
-                query.copy_to_force_quote = f"FORCE QUOTE {force_quote}"
-        else:
-            query.copy_to_force_quote = ""
-
-        # Encoding
-        set_encoding = kwargs.get("encoding")
-        query.copy_to_encoding = f"ENCODING '{set_encoding}'" if set_encoding else ""
-
-        # Escape character
-        escape_char = kwargs.get("escape")
-        query.copy_to_escape = f"ESCAPE '{escape_char}'" if escape_char else ""
+        # COPY TO options
+        query.set_copy_to_options(**kwargs)
 
         # Run the query
         compiler = query.get_compiler(self.db, connection=connection)
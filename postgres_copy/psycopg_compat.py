@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Compatibility layer for running COPY with either psycopg2 or psycopg 3.
+"""
+from codecs import utf_8_decode
+from io import TextIOBase
+
+try:
+    # Django 4.2 and later picks psycopg 3 when it is installed
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+except ImportError:
+    # Earlier releases only support psycopg2
+    is_psycopg3 = False
+
+# The default number of bytes moved per read or write during a COPY
+BUFFER_SIZE = 1024 * 1024
+
+
+if is_psycopg3:
+
+    def iter_chunks(copy, chunk_size):
+        """
+        Yields the output of a COPY joined into blocks of at least chunk_size bytes.
+        """
+        # Each read returns a single row, so gather them up before writing
+        chunks = []
+        size = 0
+        for data in copy:
+            chunks.append(data)
+            size += len(data)
+            if size >= chunk_size:
+                yield b"".join(chunks)
+                chunks = []
+                size = 0
+        if chunks:
+            yield b"".join(chunks)
+
+    def is_text(stream):
+        """
+        Returns True if the file-like object reads and writes str rather than bytes.
+        """
+        # A text-mode SpooledTemporaryFile isn't a TextIOBase, but it has an encoding
+        return isinstance(stream, TextIOBase) or hasattr(stream, "encoding")
+
+    def copy_to(cursor, sql, params, destination, chunk_size=BUFFER_SIZE):
+        """
+        Run a COPY TO STDOUT query and write the output to a file-like object.
+        """
+        # psycopg only merges parameters into COPY queries when there are some,
+        # so collapse the escaped percent signs in Django's SQL ourselves.
+        if not params:
+            sql = sql.replace("%%", "%")
+        write = destination.write
+        with cursor.copy(sql, params) as copy:
+            if is_text(destination):
+                # Text destinations need the bytes decoded. A character split
+                # across two blocks is held back until the rest of it arrives.
+                tail = b""
+                for data in iter_chunks(copy, chunk_size):
+                    data = tail + data
+                    text, consumed = utf_8_decode(data, "strict", False)
+                    write(text)
+                    tail = data[consumed:]
+                # Anything still held back is an incomplete character, so this raises
+                if tail:
+                    write(utf_8_decode(tail, "strict", True)[0])
+            else:
+                for data in iter_chunks(copy, chunk_size):
+                    write(data)
+
+    def copy_from(cursor, sql, source, buffer_size=BUFFER_SIZE):
+        """
+        Run a COPY FROM STDIN query that reads from a file-like object.
+        """
+        with cursor.copy(sql) as copy:
+            write = copy.write
+            # None from a read means no data is ready yet, only an empty read is the end
+            if is_text(source) or not hasattr(source, "readinto"):
+                # Text streams, and anything else without readinto(),
+                # are read a block at a time
+                read = source.read
+                while True:
+                    data = read(buffer_size)
+                    if data is None:
+                        continue
+                    if not data:
+                        break
+                    write(data)
+            else:
+                # Refill one buffer instead of allocating new bytes for every block.
+                # psycopg hands each block to libpq before write() returns.
+                readinto = source.readinto
+                buffer = bytearray(buffer_size)
+                view = memoryview(buffer)
+                while True:
+                    size = readinto(buffer)
+                    if size is None:
+                        continue
+                    if not size:
+                        break
+                    write(view[:size])
+
+else:
+
+    def copy_to(cursor, sql, params, destination):
+        """
+        Run a COPY TO STDOUT query and write the output to a file-like object.
+
+        Unlike the psycopg 3 version, this takes no chunk_size. copy_expert writes
+        each row to the destination from C, and its size argument only applies
+        when reading a COPY FROM source.
+        """
+        # COPY can't take bound parameters, so let the driver inline them.
+        # Without any, the template only needs formatting to unescape percent signs.
+        if params or "%" in sql:
+            sql = cursor.mogrify(sql, params)
+        cursor.copy_expert(sql, destination)
+
+    def copy_from(cursor, sql, source, buffer_size=BUFFER_SIZE):
+        """
+        Run a COPY FROM STDIN query that reads from a file-like object.
+        """
+        # Django's debug cursor wrapper only passes copy_expert's extra arguments
+        # through positionally
+        cursor.copy_expert(sql, source, buffer_size)
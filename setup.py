@@ -4,9 +4,11 @@ from distutils.core import Command
 
 from setuptools import setup
 
+ROOT_DIR = os.path.dirname(__file__)
+
 
 def read(fname):
-    with open(os.path.join(os.path.dirname(__file__), fname)) as f:
+    with open(os.path.join(ROOT_DIR, fname)) as f:
         return f.read()
 
 
@@ -18,13 +20,13 @@ def version_scheme(version):
 
     If that issue is resolved, this method can be removed.
     """
-    import time
-
-    from setuptools_scm.version import guess_next_version
-
     if version.exact:
         return version.format_with("{tag}")
     else:
+        import time
+
+        from setuptools_scm.version import guess_next_version
+
         _super_value = version.format_next_version(guess_next_version)
         now = int(time.time())
         return _super_value + str(now)
@@ -62,14 +64,14 @@ class TestCommand(Command):
                     "PORT": 5432,
                     "NAME": "test",
                     "USER": "postgres",
-                    "ENGINE": "django.db.backends.postgresql_psycopg2",
+                    "ENGINE": "django.db.backends.postgresql",
                 },
                 "other": {
                     "HOST": "localhost",
                     "PORT": 5432,
                     "NAME": "test_alternative",
                     "USER": "postgres",
-                    "ENGINE": "django.db.backends.postgresql_psycopg2",
+                    "ENGINE": "django.db.backends.postgresql",
                 },
                 "sqlite": {"NAME": "sqlite", "ENGINE": "django.db.backends.sqlite3"},
                 "secondary": {
@@ -77,7 +79,7 @@ class TestCommand(Command):
                     "PORT": 5432,
                     "NAME": "test_secondary",
                     "USER": "postgres",
-                    "ENGINE": "django.db.backends.postgresql_psycopg2",
+                    "ENGINE": "django.db.backends.postgresql",
                 },
             },
             INSTALLED_APPS=("tests",),
@@ -90,9 +92,7 @@ class TestCommand(Command):
                     "file": {
                         "level": "DEBUG",
                         "class": "logging.FileHandler",
-                        "filename": os.path.join(
-                            os.path.dirname(__file__), "tests.log"
-                        ),
+                        "filename": os.path.join(ROOT_DIR, "tests.log"),
                     },
                 },
                 "formatters": {
@@ -111,7 +111,15 @@ class TestCommand(Command):
             },
         )
         django.setup()
-        call_command("test", "tests")
+        # Runs serially by default. Set TEST_PARALLEL to a number of processes
+        # to split the test cases up, or TEST_KEEPDB to 1, true or yes to reuse
+        # the test databases.
+        call_command(
+            "test",
+            "tests",
+            parallel=int(os.environ.get("TEST_PARALLEL", 1)),
+            keepdb=os.environ.get("TEST_KEEPDB", "").lower() in ("1", "true", "yes"),
+        )
 
 
 setup(
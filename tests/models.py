@@ -19,17 +19,19 @@ class MockObject(models.Model):
         app_label = "tests"
         unique_together = ("name", "number")
 
-    def __init__(self, *args, **kwargs):
-      super().__init__(*args, **kwargs)
-      if django.get_version() <= '5.1':
-        self._meta.index_together = ("name", "number")
-      else:
-        self._meta.indexes = [models.Index(fields=["name", "number"])]
-
     def copy_name_template(self):
         return 'upper("%(name)s")'
 
 
+# Django 5.1 removed index_together, so later releases get the equivalent index.
+# Both are set on the class here, once, rather than in Meta.
+if django.VERSION < (5, 1):
+    MockObject._meta.index_together = (("name", "number"),)
+else:
+    MockObject._meta.indexes = [models.Index(fields=["name", "number"])]
+    MockObject._meta.indexes[0].set_name_with_model(MockObject)
+
+
 class MockFKObject(models.Model):
     id = models.IntegerField(primary_key=True)
     name = models.CharField(max_length=500)
@@ -1,16 +1,17 @@
 import csv
 import io
 import os
+import tempfile
 from datetime import date
-from unittest import mock
+from unittest import mock, skipIf, skipUnless
 
 from django.core.exceptions import FieldDoesNotExist
-from django.db import transaction
+from django.db import connection, transaction
 from django.db.models import Count
 from django.db.transaction import TransactionManagementError
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 
-from postgres_copy import CopyMapping
+from postgres_copy import CopyMapping, psycopg_compat
 
 from .models import (
     ExtendedMockObject,
@@ -138,6 +139,13 @@ class PostgresCopyToTest(BaseTest):
         reader = csv.DictReader(open(self.export_path))
         self.assertTrue(["1", "2", "3", "NULL", ""], [i["num"] for i in reader])
 
+    @mock.patch("django.db.connection.validate_no_atomic_block")
+    def test_export_null_string_with_apostrophe(self, _):
+        self._load_objects(self.blank_null_path)
+        MockObject.objects.to_csv(self.export_path, null="N'A")
+        reader = csv.DictReader(open(self.export_path))
+        self.assertIn("N'A", [i["num"] for i in reader])
+
     @mock.patch("django.db.connection.validate_no_atomic_block")
     def test_export_quote_character_and_force_quoting(self, _):
         self._load_objects(self.name_path)
@@ -163,6 +171,13 @@ class PostgresCopyToTest(BaseTest):
             [(i["name"], i["dt"]) for i in reader],
         )
 
+        # Multiple columns passed as a tuple work the same way
+        MockObject.objects.to_csv(
+            self.export_path, quote="|", force_quote=("NAME", "DT")
+        )
+        reader = csv.DictReader(open(self.export_path))
+        self.assertEqual(["|BEN|", "|JOE|", "|JANE|"], [i["name"] for i in reader])
+
         # All columns force_quoted with pipes
         MockObject.objects.to_csv(self.export_path, quote="|", force_quote=True)
         self.assertTrue(os.path.exists(self.export_path))
@@ -310,6 +325,15 @@ class PostgresCopyFromTest(BaseTest):
                 dict(name1="NAME", number="NUMBER", dt="DATE"),
             )
 
+    def test_lazy_open(self):
+        c = CopyMapping(
+            MockObject,
+            self.name_path,
+            dict(name="NAME", number="NUMBER", dt="DATE"),
+        )
+        self.assertIsNone(c.csv_file)
+        self.assertEqual(c.headers, ["NAME", "NUMBER", "DATE"])
+
     def test_limited_fields(self):
         CopyMapping(
             LimitedMockObject,
@@ -355,6 +379,115 @@ class PostgresCopyFromTest(BaseTest):
         self.assertEqual(MockObject.objects.get(name="BEN").dt, date(2012, 1, 1))
         self.assertEqual(insert_count, 3)
 
+    def test_composite_index(self):
+        # index_together before Django 5.1 and Meta.indexes after build the same index
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, MockObject._meta.db_table
+            )
+        composite = [
+            c
+            for c in constraints.values()
+            if c["index"] and not c["unique"] and c["columns"] == ["name", "num"]
+        ]
+        self.assertEqual(len(composite), 1)
+        self.assertEqual(composite[0]["type"], "btree")
+        self.assertEqual(composite[0]["orders"], ["ASC", "ASC"])
+
+    @mock.patch("django.db.connection.validate_no_atomic_block")
+    def test_save_restores_constraints_and_indexes(self, _):
+        MockObject.objects.from_csv(
+            self.name_path,
+            dict(name="NAME", number="NUMBER", dt="DATE"),
+            drop_constraints=True,
+            drop_indexes=True,
+        )
+        table = MockObject._meta.db_table
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, table)
+        with connection.schema_editor() as schema_editor:
+            index_name = schema_editor._create_index_name(table, ["parent_id"])
+        self.assertTrue(
+            any(
+                c["foreign_key"] and c["columns"] == ["parent_id"]
+                for c in constraints.values()
+            )
+        )
+        self.assertTrue(
+            any(
+                c["unique"] and not c["primary_key"] and c["columns"] == ["name", "num"]
+                for c in constraints.values()
+            )
+        )
+        self.assertIn(index_name, constraints)
+        self.assertTrue(
+            any(
+                c["index"] and not c["unique"] and c["columns"] == ["name", "num"]
+                for c in constraints.values()
+            )
+        )
+
+    def test_drop_reports_changes(self):
+        self.assertTrue(MockObject.objects.drop_constraints())
+        self.assertFalse(MockObject.objects.drop_constraints())
+        self.assertTrue(MockObject.objects.drop_indexes())
+        self.assertFalse(MockObject.objects.drop_indexes())
+        MockObject.objects.restore_constraints()
+        MockObject.objects.restore_indexes()
+
+    @mock.patch("django.db.connection.validate_no_atomic_block")
+    def test_save_only_restores_what_it_dropped(self, _):
+        table = MockObject._meta.db_table
+        parent = MockObject._meta.get_field("parent")
+        parent_copy = parent.__copy__()
+        parent_copy.db_index = False
+        with connection.schema_editor() as schema_editor:
+            schema_editor.alter_field(MockObject, parent, parent_copy)
+            index_name = schema_editor._create_index_name(table, ["parent_id"])
+        MockObject.objects.from_csv(
+            self.name_path,
+            dict(name="NAME", number="NUMBER", dt="DATE"),
+            drop_constraints=False,
+            drop_indexes=True,
+        )
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, table)
+        # The index missing before the load is still missing
+        self.assertNotIn(index_name, constraints)
+        self.assertTrue(
+            any(
+                c["index"] and not c["unique"] and c["columns"] == ["name", "num"]
+                for c in constraints.values()
+            )
+        )
+        MockObject.objects.restore_indexes()
+
+    @mock.patch("django.db.connection.validate_no_atomic_block")
+    def test_failed_restore_leaves_the_others(self, _):
+        mapping = dict(name="NAME", number="NUMBER", dt="DATE")
+        MockObject.objects.from_csv(self.name_path, mapping)
+        # Loading the same rows again breaks unique_together, so it can't be restored
+        MockObject.objects.from_csv(self.name_path, mapping)
+        self.assertEqual(MockObject.objects.count(), 6)
+        table = MockObject._meta.db_table
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, table)
+        with connection.schema_editor() as schema_editor:
+            index_name = schema_editor._create_index_name(table, ["parent_id"])
+        self.assertFalse(
+            any(
+                c["unique"] and not c["primary_key"] and c["columns"] == ["name", "num"]
+                for c in constraints.values()
+            )
+        )
+        self.assertTrue(
+            any(
+                c["foreign_key"] and c["columns"] == ["parent_id"]
+                for c in constraints.values()
+            )
+        )
+        self.assertIn(index_name, constraints)
+
     @mock.patch("django.db.connection.validate_no_atomic_block")
     def test_loud_save(self, _):
         MockObject.objects.from_csv(
@@ -459,6 +592,20 @@ class PostgresCopyFromTest(BaseTest):
         self.assertEqual(MockObject.objects.get(name="NULLBOY").number, None)
         self.assertEqual(MockObject.objects.get(name="BEN").dt, date(2012, 1, 1))
 
+    @mock.patch("django.db.connection.validate_no_atomic_block")
+    def test_null_save_with_apostrophe(self, _):
+        source = io.StringIO(
+            "NAME,NUMBER,DATE\nBEN,1,2012-01-01\nNULLBOY,N'A,2012-01-02\n"
+        )
+        MockObject.objects.from_csv(
+            source,
+            dict(name="NAME", number="NUMBER", dt="DATE"),
+            null="N'A",
+        )
+        self.assertEqual(MockObject.objects.count(), 2)
+        self.assertEqual(MockObject.objects.get(name="BEN").number, 1)
+        self.assertEqual(MockObject.objects.get(name="NULLBOY").number, None)
+
     @mock.patch("django.db.connection.validate_no_atomic_block")
     def test_force_not_null_save(self, _):
         MockBlankObject.objects.from_csv(
@@ -514,6 +661,17 @@ class PostgresCopyFromTest(BaseTest):
         self.assertEqual(MockObject.objects.get(name="BADBOY").number, None)
         self.assertEqual(MockObject.objects.get(name="BEN").dt, date(2012, 1, 1))
 
+    @mock.patch("django.db.connection.validate_no_atomic_block")
+    def test_postgresql_only_encoding_save(self, _):
+        # Python has no codec by this name, but PostgreSQL does
+        MockObject.objects.from_csv(
+            self.name_path,
+            dict(name="NAME", number="NUMBER", dt="DATE"),
+            encoding="WIN1252",
+        )
+        self.assertEqual(MockObject.objects.count(), 3)
+        self.assertEqual(MockObject.objects.get(name="BEN").number, 1)
+
     @mock.patch("django.db.connection.validate_no_atomic_block")
     def test_ignore_conflicts(self, _):
         UniqueMockObject.objects.from_csv(
@@ -700,3 +858,125 @@ class MultiDbTest(BaseTest):
         self.assertTrue(["BEN", "JOE", "JANE"], [i["name"] for i in reader])
         MockObject.objects.using("other").all().delete()
         os.remove(export_path)
+
+
+class PsycopgCompatTest(SimpleTestCase):
+    def setUp(self):
+        self.cursor = mock.MagicMock()
+        self.copy = self.cursor.copy.return_value.__enter__.return_value
+
+    @skipIf(psycopg_compat.is_psycopg3, "psycopg2 only")
+    def test_copy_to_with_psycopg2(self):
+        destination = io.BytesIO()
+        psycopg_compat.copy_to(self.cursor, "SELECT %s, %s", (1, 2), destination)
+        self.cursor.mogrify.assert_called_once_with("SELECT %s, %s", (1, 2))
+        self.cursor.copy_expert.assert_called_once_with(
+            self.cursor.mogrify.return_value, destination
+        )
+
+    @skipIf(psycopg_compat.is_psycopg3, "psycopg2 only")
+    def test_copy_to_without_params_with_psycopg2(self):
+        destination = io.BytesIO()
+        psycopg_compat.copy_to(self.cursor, "SELECT 1", (), destination)
+        self.cursor.mogrify.assert_not_called()
+        self.cursor.copy_expert.assert_called_once_with("SELECT 1", destination)
+
+    @skipIf(psycopg_compat.is_psycopg3, "psycopg2 only")
+    def test_copy_from_with_psycopg2(self):
+        source = io.StringIO("test data")
+        psycopg_compat.copy_from(self.cursor, "COPY test FROM STDIN", source)
+        self.cursor.copy_expert.assert_called_once_with(
+            "COPY test FROM STDIN", source, psycopg_compat.BUFFER_SIZE
+        )
+
+    def test_copy_from_with_debug_cursor(self):
+        # Django wraps cursors like this when DEBUG is on
+        cursor = connection.make_debug_cursor(self.cursor)
+        source = io.StringIO("test data")
+        psycopg_compat.copy_from(cursor, "COPY test FROM STDIN", source)
+        self.assertEqual(connection.queries_log[-1]["sql"], "COPY test FROM STDIN")
+
+    @skipUnless(psycopg_compat.is_psycopg3, "psycopg 3 only")
+    def test_copy_to_with_psycopg3(self):
+        self.copy.__iter__.return_value = iter([b"a,b\n", b"\xc3", b"\xa9\n"])
+        destination = io.BytesIO()
+        psycopg_compat.copy_to(self.cursor, "SELECT %s", (1,), destination)
+        self.cursor.copy.assert_called_once_with("SELECT %s", (1,))
+        self.assertEqual(destination.getvalue(), b"a,b\n\xc3\xa9\n")
+
+    @skipUnless(psycopg_compat.is_psycopg3, "psycopg 3 only")
+    def test_copy_to_in_chunks_with_psycopg3(self):
+        self.copy.__iter__.return_value = iter([b"ab"] * 25)
+        destination = mock.Mock(spec=io.BytesIO)
+        psycopg_compat.copy_to(self.cursor, "SELECT 1", (), destination, chunk_size=10)
+        self.assertEqual(destination.write.call_count, 5)
+        destination.write.assert_called_with(b"ab" * 5)
+
+    @skipUnless(psycopg_compat.is_psycopg3, "psycopg 3 only")
+    def test_copy_to_text_with_psycopg3(self):
+        self.copy.__iter__.return_value = iter([b"a,b\n", b"\xc3", b"\xa9\n"])
+        destination = io.StringIO()
+        # Write every read on its own so the split character spans two writes
+        psycopg_compat.copy_to(
+            self.cursor, "SELECT '100%%'", (), destination, chunk_size=1
+        )
+        self.cursor.copy.assert_called_once_with("SELECT '100%'", ())
+        self.assertEqual(destination.getvalue(), "a,b\n\xe9\n")
+
+    @skipUnless(psycopg_compat.is_psycopg3, "psycopg 3 only")
+    def test_copy_to_text_truncated_with_psycopg3(self):
+        self.copy.__iter__.return_value = iter([b"a,b\n", b"\xc3"])
+        with self.assertRaises(UnicodeDecodeError):
+            psycopg_compat.copy_to(self.cursor, "SELECT 1", (), io.StringIO())
+
+    @skipUnless(psycopg_compat.is_psycopg3, "psycopg 3 only")
+    def test_copy_from_with_psycopg3(self):
+        source = io.StringIO("test data")
+        psycopg_compat.copy_from(self.cursor, "COPY test FROM STDIN", source)
+        self.cursor.copy.assert_called_once_with("COPY test FROM STDIN")
+        self.copy.write.assert_called_once_with("test data")
+
+    @skipUnless(psycopg_compat.is_psycopg3, "psycopg 3 only")
+    def test_copy_from_binary_with_psycopg3(self):
+        written = []
+        self.copy.write.side_effect = lambda data: written.append(bytes(data))
+        data = b"x" * (psycopg_compat.BUFFER_SIZE + 10)
+        psycopg_compat.copy_from(self.cursor, "COPY test FROM STDIN", io.BytesIO(data))
+        self.assertEqual(len(written), 2)
+        self.assertEqual(b"".join(written), data)
+
+    @skipUnless(psycopg_compat.is_psycopg3, "psycopg 3 only")
+    def test_copy_from_text_in_blocks_with_psycopg3(self):
+        source = io.StringIO("a,b\n" * 5)
+        psycopg_compat.copy_from(
+            self.cursor, "COPY test FROM STDIN", source, buffer_size=8
+        )
+        self.assertEqual(self.copy.write.call_count, 3)
+        self.copy.write.assert_called_with("a,b\n")
+
+    @skipUnless(psycopg_compat.is_psycopg3, "psycopg 3 only")
+    def test_copy_from_spooled_text_with_psycopg3(self):
+        # Text-mode spooled files have a readinto() that can't be called
+        with tempfile.SpooledTemporaryFile(mode="w+") as source:
+            source.write("test data")
+            source.seek(0)
+            psycopg_compat.copy_from(self.cursor, "COPY test FROM STDIN", source)
+        self.copy.write.assert_called_once_with("test data")
+
+    @skipUnless(psycopg_compat.is_psycopg3, "psycopg 3 only")
+    def test_copy_from_nonblocking_with_psycopg3(self):
+        written = []
+        self.copy.write.side_effect = lambda data: written.append(bytes(data))
+        source = mock.Mock(spec=io.RawIOBase)
+        reads = iter([b"ab", None, b"cd", b""])
+
+        def readinto(buffer):
+            data = next(reads)
+            if data is None:
+                return None
+            buffer[: len(data)] = data
+            return len(data)
+
+        source.readinto.side_effect = readinto
+        psycopg_compat.copy_from(self.cursor, "COPY test FROM STDIN", source)
+        self.assertEqual(b"".join(written), b"abcd")